@@ -16,10 +16,41 @@ To run, merge, and plot using 4 processes, for instance:
 
 import numpy as np
 import dedalus.public as d3
+from dedalus.core.evaluator import H5GatherFileHandler
+from mpi4py import MPI
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class CompressedFileHandler(H5GatherFileHandler):
+    """Gather file handler storing one compressed chunk per write.
+
+    Dedalus lets h5py guess the chunk shape, which splits each write into
+    several small chunks. Using the full write as the chunk means both the
+    simulation and the post-processing scripts touch exactly one chunk per
+    timestep, and the smooth fields compress well with shuffle + gzip. Gzip
+    (deflate) is built into libhdf5, so ParaView and VisIt can read the data
+    through the XDMF files without extra filter plugins.
+    """
+
+    def create_task_dataset(self, file, task):
+        """Create dataset for a task."""
+        shape = (1,) + task["global_shape"]
+        maxshape = (self.max_writes,) + task["global_shape"]
+        dset = file["tasks"].create_dataset(
+            name=task["name"],
+            shape=shape,
+            maxshape=maxshape,
+            chunks=shape,
+            dtype=task["dtype"],
+            compression="gzip",
+            compression_opts=1,
+            shuffle=True,
+        )
+        return dset
+
+
 # Parameters - Make more unstable
 Lx, Lz = 4.0, 1.0
 Nx, Nz = 256, 64
@@ -28,6 +59,7 @@ stop_sim_time = 10.0  # Reduced time
 timestepper = d3.RK222
 max_timestep = 0.01  # Smaller timestep for stability
 dtype = np.float64
+snapshot_scales = 0.5  # Visualization output on a (Nx/2, Nz/2) grid
 
 
 # Bases
@@ -77,24 +109,40 @@ solver = problem.build_solver(timestepper)
 solver.stop_sim_time = stop_sim_time
 
 # Initial conditions - Much stronger perturbations
+# Profiles are separable, so evaluate them on the 1D grids (shapes (Nx, 1) and
+# (1, Nz)) and let broadcasting fill the 2D field buffers
+tanh_z = np.tanh(z / 0.05)
+sin_x = np.sin(2 * np.pi * x / Lx)
+gauss_z = np.exp(-((z / 0.2) ** 2))
+
 # Shear layer
-u["g"][0] = 0.5 * np.tanh(z / 0.05)
+u["g"][0] = 0.5 * tanh_z
 # Passive scalar mimics the shear layer
-s["g"] = np.tanh(z / 0.05)
+s["g"] = tanh_z
 
 # Add much stronger sinusoidal perturbations to trigger instability
-u["g"][1] += 0.1 * np.sin(2 * np.pi * x / Lx) * np.exp(-((z / 0.2) ** 2))
+# (u_z starts at zero, so the outer product is written straight into it)
+np.multiply(sin_x, 0.1 * gauss_z, out=u["g"][1])
 
 # Analysis
 import pathlib
 
 script_dir = pathlib.Path(__file__).parent
-snapshots = solver.evaluator.add_file_handler(
-    script_dir / "snapshots", sim_dt=0.1, max_writes=150
+snapshots = solver.evaluator.add_handler(
+    CompressedFileHandler(
+        script_dir / "snapshots",
+        dist,
+        solver.evaluator.vars,
+        sim_dt=0.1,
+        max_writes=150,
+    )
 )
-snapshots.add_task(s, name="scalar")
-snapshots.add_task(u, name="velocity")
-snapshots.add_task(d3.div(d3.skew(u)), name="vorticity")
+snapshots.add_task(s, name="scalar", scales=snapshot_scales)
+# Velocity components as separate scalar tasks, so each one is stored
+# contiguously and can be read on its own
+snapshots.add_task(u @ ex, name="velocity_u", scales=snapshot_scales)
+snapshots.add_task(u @ ez, name="velocity_w", scales=snapshot_scales)
+snapshots.add_task(d3.div(d3.skew(u)), name="vorticity", scales=snapshot_scales)
 
 # CFL
 CFL = d3.CFL(
@@ -111,7 +159,24 @@ CFL.add_velocity(u)
 
 # Flow properties
 flow = d3.GlobalFlowProperty(solver, cadence=10)
-flow.add_property(np.sqrt(u @ u), name="speed")
+# Track the squared speed; the sqrt is taken on the reduced maximum only
+flow.add_property(u @ u, name="speed_sq")
+
+# max(speed) is only logged, so its global reduction is non-blocking: it is
+# started on a cadence iteration and completed after the following step,
+# hiding the collective latency behind that step's compute
+speed_sq_max = np.zeros(1)
+pending_log = None
+
+
+def log_progress(request, iteration, sim_time, timestep):
+    """Wait for a started max(speed) reduction and log the progress line."""
+    request.Wait()
+    max_speed = np.sqrt(speed_sq_max[0])
+    logger.info(
+        f"Iteration={iteration}, Time={sim_time:.2e}, dt={timestep:.2e}, max(speed)={max_speed:.2f}"
+    )
+
 
 # Main loop
 try:
@@ -119,11 +184,16 @@ try:
     while solver.proceed:
         timestep = CFL.compute_timestep()
         solver.step(timestep)
+        if pending_log is not None:
+            log_progress(*pending_log)
+            pending_log = None
         if (solver.iteration - 1) % 10 == 0:
-            max_speed = flow.max("speed")
-            logger.info(
-                f"Iteration={solver.iteration}, Time={solver.sim_time:.2e}, dt={timestep:.2e}, max(speed)={max_speed:.2f}"
-            )
+            speed_sq = flow.properties["speed_sq"]["g"]
+            speed_sq_max[0] = speed_sq.max() if speed_sq.size else -np.inf
+            request = dist.comm.Iallreduce(MPI.IN_PLACE, speed_sq_max, op=MPI.MAX)
+            pending_log = (request, solver.iteration, solver.sim_time, timestep)
+    if pending_log is not None:
+        log_progress(*pending_log)
 except:
     logger.error("Exception raised, triggering end of main loop.")
     raise
@@ -3,6 +3,23 @@ import numpy as np
 import pathlib
 
 
+def read_timestep(dset, i, out=None):
+    """Read a single timestep into out (allocated if not given)."""
+    if out is None:
+        out = np.empty(dset.shape[1:], dtype=dset.dtype)
+    dset.read_direct(out, np.s_[i])
+    return out
+
+
+def field_stats(data):
+    """Return (min, max, mean, std) of each field in a stack."""
+    flat = data.reshape(data.shape[0], -1)
+    return np.stack(
+        [flat.min(axis=1), flat.max(axis=1), flat.mean(axis=1), flat.std(axis=1)],
+        axis=1,
+    )
+
+
 def check_data_values():
     """Check the actual data values to see if the instability developed."""
 
@@ -15,41 +32,64 @@ def check_data_values():
         print(f"Number of time steps: {len(sim_time)}")
 
         # Check scalar field evolution
-        scalar_data = h5_file["tasks/scalar"][:]
-        print(f"\nScalar field shape: {scalar_data.shape}")
+        scalar_dset = h5_file["tasks/scalar"]
+        print(f"\nScalar field shape: {scalar_dset.shape}")
 
         # Check values at different times
         times_to_check = [0, len(sim_time) // 4, len(sim_time) // 2, -1]
 
-        for i in times_to_check:
-            data_slice = scalar_data[i, :, :]
+        # Read the sampled timesteps straight into one preallocated stack
+        scalar_slices = np.empty(
+            (len(times_to_check),) + scalar_dset.shape[1:], dtype=scalar_dset.dtype
+        )
+        for k, i in enumerate(times_to_check):
+            read_timestep(scalar_dset, i, out=scalar_slices[k])
+        scalar_stats = field_stats(scalar_slices)
+
+        for i, (s_min, s_max, s_mean, s_std) in zip(times_to_check, scalar_stats):
             print(f"\nTime step {i} (t={sim_time[i]:.3f}):")
-            print(f"  Min: {data_slice.min():.6f}")
-            print(f"  Max: {data_slice.max():.6f}")
-            print(f"  Mean: {data_slice.mean():.6f}")
-            print(f"  Std: {data_slice.std():.6f}")
+            print(f"  Min: {s_min:.6f}")
+            print(f"  Max: {s_max:.6f}")
+            print(f"  Mean: {s_mean:.6f}")
+            print(f"  Std: {s_std:.6f}")
 
-        # Check velocity field
-        velocity_data = h5_file["tasks/velocity"][:]
-        print(f"\nVelocity field shape: {velocity_data.shape}")
+        # Check velocity field, stored either as a vector task or as separate
+        # component tasks
+        tasks = h5_file["tasks"]
+        if "velocity" in tasks:
+            velocity_dset = tasks["velocity"]
+            print(f"\nVelocity field shape: {velocity_dset.shape}")
+            final_vel = read_timestep(velocity_dset, -1)
+        elif "velocity_u" in tasks and "velocity_w" in tasks:
+            u_dset = tasks["velocity_u"]
+            w_dset = tasks["velocity_w"]
+            print(f"\nVelocity component shape: {u_dset.shape}")
+            final_vel = np.empty((2,) + u_dset.shape[1:], dtype=u_dset.dtype)
+            read_timestep(u_dset, -1, out=final_vel[0])
+            read_timestep(w_dset, -1, out=final_vel[1])
+        else:
+            raise ValueError(
+                "No velocity data found: expected a 'velocity' task or "
+                "'velocity_u' and 'velocity_w' tasks"
+            )
 
         # Check velocity components at final time
-        final_vel = velocity_data[-1, :, :, :]
+        vel_stats = field_stats(final_vel)
         print(f"\nFinal velocity field:")
         print(
-            f"  U-component (x): min={final_vel[0].min():.6f}, max={final_vel[0].max():.6f}"
+            f"  U-component (x): min={vel_stats[0, 0]:.6f}, max={vel_stats[0, 1]:.6f}"
         )
         print(
-            f"  W-component (z): min={final_vel[1].min():.6f}, max={final_vel[1].max():.6f}"
+            f"  W-component (z): min={vel_stats[1, 0]:.6f}, max={vel_stats[1, 1]:.6f}"
         )
 
         # Check vorticity
-        vorticity_data = h5_file["tasks/vorticity"][:]
-        final_vort = vorticity_data[-1, :, :]
+        final_vort = h5_file["tasks/vorticity"][-1]
+        vort_min, vort_max, _, vort_std = field_stats(final_vort[np.newaxis])[0]
         print(f"\nFinal vorticity:")
-        print(f"  Min: {final_vort.min():.6f}")
-        print(f"  Max: {final_vort.max():.6f}")
-        print(f"  Std: {final_vort.std():.6f}")
+        print(f"  Min: {vort_min:.6f}")
+        print(f"  Max: {vort_max:.6f}")
+        print(f"  Std: {vort_std:.6f}")
 
 
 if __name__ == "__main__":
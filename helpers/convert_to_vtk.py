@@ -1,86 +1,138 @@
+import functools
 import h5py
+import multiprocessing
 import numpy as np
 import pathlib
 from pyevtk.hl import gridToVTK
 
+# Precision of the VTK output. Single precision is plenty for visualization
+# and halves the size of the files written and later loaded by ParaView/VisIt.
+VTK_DTYPE = np.float32
+
+# Point-data names for velocity saved as separate component tasks. They match
+# the names written for a vector velocity task, so saved ParaView states work
+# with either layout.
+VELOCITY_COMPONENT_NAMES = {"velocity_u": "u_velocity", "velocity_w": "w_velocity"}
+
 
 def find_coordinate_datasets(h5_file):
     """Find the coordinate datasets by their NAME attribute."""
-    x_key = None
-    z_key = None
+    keys = {}
 
-    for key in h5_file["scales"].keys():
-        dataset = h5_file["scales"][key]
-        if hasattr(dataset, "attrs") and "NAME" in dataset.attrs:
-            name = dataset.attrs["NAME"]
+    def visit(key, obj):
+        if isinstance(obj, h5py.Dataset) and "NAME" in obj.attrs:
+            name = obj.attrs["NAME"]
             if isinstance(name, bytes):
                 name = name.decode("utf-8")
-            if name == "x":
-                x_key = key
-            elif name == "z":
-                z_key = key
-
-    return x_key, z_key
-
-
-def convert_hdf5_to_vtk():
-    """Convert Dedalus HDF5 files to VTK format."""
+            if name in ("x", "z"):
+                keys.setdefault(name, key)
+        # Returning anything but None stops the traversal early
+        if "x" in keys and "z" in keys:
+            return True
+
+    h5_file["scales"].visititems(visit)
+    return keys.get("x"), keys.get("z")
+
+
+def convert_file_to_vtk(file_path, vtk_dir):
+    """Convert a single Dedalus HDF5 snapshot file to VTK format."""
+    print(f"Processing {file_path.name}")
+
+    with h5py.File(file_path, "r") as h5_file:
+        # Get time data
+        sim_time = h5_file["scales/sim_time"][:]
+
+        # Find coordinate datasets
+        x_key, z_key = find_coordinate_datasets(h5_file)
+        if not x_key or not z_key:
+            raise ValueError("Could not find x and z coordinate datasets")
+
+        x = h5_file[f"scales/{x_key}"][:].astype(VTK_DTYPE)
+        z = h5_file[f"scales/{z_key}"][:].astype(VTK_DTYPE)
+
+        # 1D coordinate axes; gridToVTK writes them as a rectilinear grid
+        y = np.array([0.0], dtype=VTK_DTYPE)  # Single Y coordinate for 2D data
+
+        # Read each task once, cast to the output precision; timesteps are then
+        # sliced in memory
+        tasks = list(h5_file["tasks"].keys())
+        task_arrays = {
+            task: h5_file[f"tasks/{task}"][:].astype(VTK_DTYPE, copy=False)
+            for task in tasks
+        }
+
+        # Only (t, Nx, Nz) scalar and (t, 2, Nx, Nz) vector tasks map onto the
+        # grid; pyevtk does not check array sizes, so reject anything else
+        # before any file is written
+        grid_shape = (len(x), len(z))
+        for task in tasks:
+            shape = task_arrays[task].shape
+            if shape[-2:] != grid_shape or not (
+                len(shape) == 3 or (len(shape) == 4 and shape[1] == 2)
+            ):
+                raise ValueError(
+                    f"Task '{task}' has shape {shape}; expected (t, {len(x)}, "
+                    f"{len(z)}) for a scalar or (t, 2, {len(x)}, {len(z)}) for a vector"
+                )
+
+        split_velocity = all(task in tasks for task in VELOCITY_COMPONENT_NAMES)
+
+        # Dummy v-component for 3D VTK vectors, shared by all timesteps
+        v_component = np.zeros(len(x) * len(z), dtype=VTK_DTYPE)
+
+        # Process each timestep
+        for i, t in enumerate(sim_time):
+            # Prepare data dictionary
+            pointData = {}
+
+            for task in tasks:
+                data = task_arrays[task][i]
+
+                if data.ndim == 3:
+                    # Handle vector field - shape is (2, Nx, Nz)
+                    u_component = data[0].ravel(order="F")
+                    w_component = data[1].ravel(order="F")
+                    pointData[task] = (u_component, v_component, w_component)
+                    pointData[f"u_{task}"] = u_component
+                    pointData[f"w_{task}"] = w_component
+                elif split_velocity and task in VELOCITY_COMPONENT_NAMES:
+                    pointData[VELOCITY_COMPONENT_NAMES[task]] = data.ravel(order="F")
+                else:
+                    # Handle scalar fields
+                    pointData[task] = data.ravel(order="F")
+
+            # Combine velocity components into a vector for glyphs/streamlines
+            if split_velocity:
+                u_component = pointData["u_velocity"]
+                w_component = pointData["w_velocity"]
+                pointData["velocity"] = (u_component, v_component, w_component)
+
+            # Create output filename
+            output_name = vtk_dir / f"{file_path.stem}_t_{i:06d}"
+
+            # Write VTK file
+            gridToVTK(str(output_name), x, y, z, pointData=pointData)
+
+    print(f"Converted {file_path.name} to VTK format")
+
+
+def convert_hdf5_to_vtk(processes=None):
+    """Convert Dedalus HDF5 files to VTK format.
+
+    Snapshot files are independent, so they are converted in parallel
+    across a pool of worker processes (one per CPU core by default).
+    """
 
     snapshots_dir = pathlib.Path("snapshots")
     vtk_dir = pathlib.Path("vtk_output")
     vtk_dir.mkdir(exist_ok=True)
 
-    for file_path in sorted(snapshots_dir.glob("snapshots_s*.h5")):
-        print(f"Processing {file_path.name}")
-
-        with h5py.File(file_path, "r") as h5_file:
-            # Get time data
-            sim_time = h5_file["scales/sim_time"][:]
-
-            # Find coordinate datasets
-            x_key, z_key = find_coordinate_datasets(h5_file)
-            if not x_key or not z_key:
-                raise ValueError("Could not find x and z coordinate datasets")
-
-            x = h5_file[f"scales/{x_key}"][:]
-            z = h5_file[f"scales/{z_key}"][:]
-
-            # Create 3D coordinate meshes (VTK requires 3D)
-            y = np.array([0.0])  # Single Y coordinate for 2D data
-            X, Y, Z = np.meshgrid(x, y, z, indexing="ij")
-
-            # Get tasks
-            tasks = list(h5_file["tasks"].keys())
-
-            # Process each timestep
-            for i, t in enumerate(sim_time):
-                # Prepare data dictionary
-                pointData = {}
-
-                for task in tasks:
-                    data = h5_file[f"tasks/{task}"][i, ...]
-
-                    if task == "velocity":
-                        # Handle vector field - shape is (2, 256, 64)
-                        u_component = data[0, :, :].flatten(order="F")
-                        w_component = data[1, :, :].flatten(order="F")
-                        # Create dummy v-component for 3D VTK
-                        v_component = np.zeros_like(u_component)
-
-                        pointData["velocity"] = (u_component, v_component, w_component)
-                        pointData["u_velocity"] = u_component
-                        pointData["w_velocity"] = w_component
-                    else:
-                        # Handle scalar fields
-                        pointData[task] = data.flatten(order="F")
-
-                # Create output filename
-                output_name = vtk_dir / f"{file_path.stem}_t_{i:06d}"
-
-                # Write VTK file
-                gridToVTK(str(output_name), X, Y, Z, pointData=pointData)
+    file_paths = sorted(snapshots_dir.glob("snapshots_s*.h5"))
+    convert = functools.partial(convert_file_to_vtk, vtk_dir=vtk_dir)
 
-        print(f"Converted {file_path.name} to VTK format")
+    with multiprocessing.Pool(processes) as pool:
+        for _ in pool.imap_unordered(convert, file_paths):
+            pass
 
 
 if __name__ == "__main__":
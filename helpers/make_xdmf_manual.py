@@ -1,26 +1,71 @@
 import h5py
+import multiprocessing
 import numpy as np
 import pathlib
-import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
 
 
 def find_coordinate_datasets(h5_file):
     """Find the coordinate datasets by their NAME attribute."""
-    x_key = None
-    z_key = None
+    keys = {}
 
-    for key in h5_file["scales"].keys():
-        dataset = h5_file["scales"][key]
-        if hasattr(dataset, "attrs") and "NAME" in dataset.attrs:
-            name = dataset.attrs["NAME"]
+    def visit(key, obj):
+        if isinstance(obj, h5py.Dataset) and "NAME" in obj.attrs:
+            name = obj.attrs["NAME"]
             if isinstance(name, bytes):
                 name = name.decode("utf-8")
-            if name == "x":
-                x_key = key
-            elif name == "z":
-                z_key = key
+            if name in ("x", "z"):
+                keys.setdefault(name, key)
+        # Returning anything but None stops the traversal early
+        if "x" in keys and "z" in keys:
+            return True
 
-    return x_key, z_key
+    h5_file["scales"].visititems(visit)
+    return keys.get("x"), keys.get("z")
+
+
+# XDMF templates. Every timestep grid has the same structure, so the document
+# is assembled from pre-formatted strings rather than an ElementTree. There is
+# no indentation (ParaView/VisIt ignore it); each timestep grid is one line.
+XDMF_HEADER = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    '<Xdmf Version="3.0"><Domain>'
+    '<Grid Name="Temporal_Grid" GridType="Collection" CollectionType="Temporal">\n'
+)
+
+XDMF_FOOTER = "</Grid></Domain></Xdmf>\n"
+
+GRID_OPEN_TEMPLATE = (
+    '<Grid Name="Grid_t_{t:.6f}" GridType="Uniform"><Time Value="{t}" />'
+)
+
+GRID_CLOSE = "</Grid>\n"
+
+# Note: Dedalus stores data as (x, z), but XDMF expects (z, x) order
+GEOMETRY_TEMPLATE = (
+    '<Topology TopologyType="2DRectMesh" Dimensions="{nz} {nx}" />'
+    '<Geometry GeometryType="VXVY">'
+    '<DataItem Dimensions="{nx}" NumberType="Float" Precision="8" Format="HDF">'
+    "{x_ref}</DataItem>"
+    '<DataItem Dimensions="{nz}" NumberType="Float" Precision="8" Format="HDF">'
+    "{z_ref}</DataItem>"
+    "</Geometry>"
+)
+
+# Split around the timestep index, which is the only per-timestep field
+# Note: Keep original data dimensions for proper reading
+ATTRIBUTE_HEAD_TEMPLATE = (
+    '<Attribute Name="{name}" AttributeType="Scalar" Center="Node">'
+    '<DataItem Dimensions="{nx} {nz}" NumberType="Float" Precision="8" Format="HDF">'
+    "{task_ref}["
+)
+
+ATTRIBUTE_TAIL = ",:,:]</DataItem></Attribute>"
+
+
+def escape_attr(value):
+    """Escape a string for use inside a double-quoted XML attribute."""
+    return escape(value, {'"': "&quot;"})
 
 
 def create_xdmf_file(h5_filepath):
@@ -43,88 +88,54 @@ def create_xdmf_file(h5_filepath):
         x = h5_file[f"scales/{x_key}"][:]
         z = h5_file[f"scales/{z_key}"][:]
 
-        # Create XML structure
-        xdmf_root = ET.Element("Xdmf", Version="3.0")
-        domain = ET.SubElement(xdmf_root, "Domain")
-
-        # Create temporal grid collection
-        temporal_grid = ET.SubElement(
-            domain,
-            "Grid",
-            Name="Temporal_Grid",
-            GridType="Collection",
-            CollectionType="Temporal",
+    # Format everything shared by all timesteps once
+    h5_name = escape(h5_filepath.name)
+    geometry = GEOMETRY_TEMPLATE.format(
+        nx=len(x),
+        nz=len(z),
+        x_ref=f"{h5_name}:/scales/{escape(x_key)}",
+        z_ref=f"{h5_name}:/scales/{escape(z_key)}",
+    )
+    attribute_heads = [
+        ATTRIBUTE_HEAD_TEMPLATE.format(
+            name=escape_attr(task),
+            nx=len(x),
+            nz=len(z),
+            task_ref=f"{h5_name}:/tasks/{escape(task)}",
         )
-
-        # Add each time step
-        for i, t in enumerate(sim_time):
-            # Create grid for this timestep
-            grid = ET.SubElement(
-                temporal_grid, "Grid", Name=f"Grid_t_{t:.6f}", GridType="Uniform"
-            )
-
-            # Add time information
-            time_elem = ET.SubElement(grid, "Time", Value=str(t))
-
-            # Add topology (2D rectangular mesh)
-            # Note: Dedalus stores data as (x, z), but XDMF expects (z, x) order
-            topology = ET.SubElement(
-                grid,
-                "Topology",
-                TopologyType="2DRectMesh",
-                Dimensions=f"{len(z)} {len(x)}",
-            )
-
-            # Add geometry
-            geometry = ET.SubElement(grid, "Geometry", GeometryType="VXVY")
-
-            # X coordinates (stored as VX in XDMF)
-            x_item = ET.SubElement(
-                geometry,
-                "DataItem",
-                Dimensions=str(len(x)),
-                NumberType="Float",
-                Precision="8",
-                Format="HDF",
-            )
-            x_item.text = f"{h5_filepath.name}:/scales/{x_key}"
-
-            # Z coordinates (stored as VY in XDMF)
-            z_item = ET.SubElement(
-                geometry,
-                "DataItem",
-                Dimensions=str(len(z)),
-                NumberType="Float",
-                Precision="8",
-                Format="HDF",
-            )
-            z_item.text = f"{h5_filepath.name}:/scales/{z_key}"
-
-            # Add data attributes
-            for task in tasks:
-                attribute = ET.SubElement(
-                    grid, "Attribute", Name=task, AttributeType="Scalar", Center="Node"
-                )
-
-                # Note: Keep original data dimensions for proper reading
-                data_item = ET.SubElement(
-                    attribute,
-                    "DataItem",
-                    Dimensions=f"{len(x)} {len(z)}",
-                    NumberType="Float",
-                    Precision="8",
-                    Format="HDF",
-                )
-                data_item.text = f"{h5_filepath.name}:/tasks/{task}[{i},:,:]"
+        for task in tasks
+    ]
+
+    # Format all times up front; Python floats format faster than NumPy
+    # scalars and give the same strings
+    grid_opens = [GRID_OPEN_TEMPLATE.format(t=t) for t in sim_time.tolist()]
+
+    # Add each time step
+    grids = [
+        grid_open
+        + geometry
+        + "".join(f"{head}{i}{ATTRIBUTE_TAIL}" for head in attribute_heads)
+        + GRID_CLOSE
+        for i, grid_open in enumerate(grid_opens)
+    ]
 
     # Write XDMF file
-    tree = ET.ElementTree(xdmf_root)
-    ET.indent(tree, space="  ", level=0)  # Pretty formatting
-    tree.write(xdmf_filepath, xml_declaration=True, encoding="utf-8")
+    with open(xdmf_filepath, "w", encoding="utf-8") as xdmf_file:
+        xdmf_file.write(XDMF_HEADER)
+        xdmf_file.write("".join(grids))
+        xdmf_file.write(XDMF_FOOTER)
 
     return xdmf_filepath
 
 
+def try_create_xdmf_file(h5_filepath):
+    """Create XDMF file, returning (path, None) or (None, error message)."""
+    try:
+        return create_xdmf_file(h5_filepath), None
+    except Exception as e:
+        return None, str(e)
+
+
 # Main execution
 if __name__ == "__main__":
     import sys
@@ -151,12 +162,16 @@ if __name__ == "__main__":
 
     print(f"Found {len(h5_files)} snapshot files in '{snapshots_dir}'")
 
-    for file_path in sorted(h5_files):
-        print(f"Processing {file_path.name}")
-        try:
-            xdmf_file = create_xdmf_file(file_path)
-            print(f"Created {xdmf_file.name}")
-        except Exception as e:
-            print(f"Error processing {file_path.name}: {e}")
+    # Snapshot files are independent, so generate their XDMF files in parallel;
+    # imap keeps the results (and the log) in file order
+    h5_files = sorted(h5_files)
+    with multiprocessing.Pool() as pool:
+        results = pool.imap(try_create_xdmf_file, h5_files)
+        for file_path, (xdmf_file, error) in zip(h5_files, results):
+            print(f"Processing {file_path.name}")
+            if error is None:
+                print(f"Created {xdmf_file.name}")
+            else:
+                print(f"Error processing {file_path.name}: {error}")
 
     print("XDMF generation complete.")